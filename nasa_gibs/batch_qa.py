@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import rasterio
+import matplotlib.image as mpimg
+
+from rasterio.enums import Resampling
+from concurrent.futures import ProcessPoolExecutor
+
+INDEX_NAME = 'qa-index.csv'
+QUICKLOOK_DIR = 'quicklooks'
+
+
+def scanTiffs(root):
+    # every downloaded tiff under root with the bits used to detect changes
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        if os.path.basename(dirpath) == QUICKLOOK_DIR:
+            continue
+        for name in sorted(filenames):
+            if name.lower().endswith(('.tif', '.tiff')):
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                files.append({'path': os.path.relpath(path, root),
+                              # integer ns, a float mtime doesn't survive
+                              #  the csv round trip exactly
+                              'mtime_ns': stat.st_mtime_ns,
+                              'size': stat.st_size})
+    return pd.DataFrame(files, columns=['path', 'mtime_ns', 'size'])
+
+
+def tiffStats(root, entry, quicklook_px=256):
+    """
+    QA stats for one tiff, read block by block so memory stays at one block.
+    - entry: row from scanTiffs (path is relative to root)
+    - quicklook_px: longest side of the quick-look png, 0 to skip
+    """
+    path = os.path.join(root, entry['path'])
+    stats = dict(entry)
+    stats['layer'] = os.path.dirname(entry['path']) or '.'
+
+    try:
+        with rasterio.open(path) as src:
+            stats.update({
+                'crs': str(src.crs),
+                'bounds': ','.join(f"{b:.6f}" for b in src.bounds),
+                'shape': f"{src.height}x{src.width}",
+                'count': src.count,
+                'dtype': src.dtypes[0],
+            })
+
+            n_valid = n_nodata = 0
+            total = 0.0
+            vmin, vmax = np.inf, -np.inf
+            for _, window in src.block_windows(1):
+                block = src.read(1, window=window, masked=True)
+                valid = block.compressed()
+                n_nodata += block.size - valid.size
+                if valid.size:
+                    n_valid += valid.size
+                    total += valid.sum(dtype='float64')
+                    vmin = min(vmin, valid.min())
+                    vmax = max(vmax, valid.max())
+
+            n_px = n_valid + n_nodata
+            stats.update({
+                'min': vmin if n_valid else np.nan,
+                'max': vmax if n_valid else np.nan,
+                'mean': total / n_valid if n_valid else np.nan,
+                'nodata_pct': 100 * n_nodata / n_px if n_px else 100.0,
+                # nothing valid, or one flat value across the whole tile
+                'blank': n_valid == 0 or vmin == vmax,
+                'error': '',
+            })
+
+            if quicklook_px:
+                # decimated read, served from overviews where the file has them
+                scale = max(src.height, src.width) / quicklook_px
+                out_shape = (max(1, int(src.height / scale)),
+                             max(1, int(src.width / scale)))
+                preview = src.read(1, out_shape=out_shape, masked=True,
+                                   resampling=Resampling.nearest)
+                png = os.path.join(root, QUICKLOOK_DIR,
+                                   os.path.splitext(entry['path'])[0] + '.png')
+                os.makedirs(os.path.dirname(png), exist_ok=True)
+                mpimg.imsave(png, preview.astype('float32').filled(np.nan),
+                             cmap='viridis')
+                stats['quicklook'] = os.path.relpath(png, root)
+
+    except Exception as e:
+        stats['error'] = str(e)
+
+    return stats
+
+
+def flagMismatches(index):
+    # CRS/bounds/shape should agree across every date of the same layer
+    for col in ('crs', 'bounds', 'shape'):
+        expected = index.groupby('layer')[col].transform(
+            lambda x: x.mode().iloc[0] if x.notna().any() else np.nan)
+        index[f"{col}_ok"] = index[col] == expected
+    return index
+
+
+def runQA(root, workers=None, quicklook_px=256):
+    """
+    Scans a download tree (e.g. ./data/edo_test) and writes root/qa-index.csv.
+    Files already in the index with the same mtime and size are not re-read,
+    so reruns only pay for new or changed downloads.
+    """
+    index_path = os.path.join(root, INDEX_NAME)
+    files = scanTiffs(root)
+
+    if os.path.exists(index_path):
+        index = pd.read_csv(index_path)
+        if 'mtime_ns' not in index:
+            # index written before mtimes were stored as ns, redo it all
+            index = pd.DataFrame(columns=['path', 'mtime_ns', 'size'])
+        merged = files.merge(index[['path', 'mtime_ns', 'size']],
+                             on='path', how='left', suffixes=('', '_seen'))
+        unchanged = ((merged['mtime_ns'] == merged['mtime_ns_seen']) &
+                     (merged['size'] == merged['size_seen']))
+        todo = files[~unchanged.to_numpy()]
+        # keep results for unchanged files, drop ones that were deleted
+        index = index[index['path'].isin(files.loc[unchanged.to_numpy(), 'path'])]
+    else:
+        index = pd.DataFrame()
+        todo = files
+
+    print(f"QA on {root}: {len(files)} tiffs, {len(todo)} new or changed")
+
+    results = []
+    if len(todo):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(tiffStats, root, entry, quicklook_px)
+                       for entry in todo.to_dict('records')]
+            for i, future in enumerate(futures, 1):
+                results.append(future.result())
+                if i % 50 == 0 or i == len(futures):
+                    print(f"  {i}/{len(futures)} checked")
+
+    if results:
+        fresh = pd.DataFrame(results)
+        index = fresh if index.empty else pd.concat([index, fresh],
+                                                     ignore_index=True)
+    if index.empty:
+        return index
+
+    index = flagMismatches(index.sort_values('path').reset_index(drop=True))
+    index.to_csv(index_path, index=False)
+
+    bad = index[index['blank'].astype(bool) | (index['error'].fillna('') != '') |
+                ~(index['crs_ok'] & index['bounds_ok'] & index['shape_ok'])]
+    print(f"  {len(bad)} files flagged (blank, unreadable or mismatched)")
+    print(f"  Index: {index_path}\n")
+
+    return index
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else './data/edo_test'
+    runQA(root)
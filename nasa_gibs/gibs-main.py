@@ -1,52 +1,21 @@
 #!/usr/bin/env python3 
 
-import os
-from io import BytesIO
-
-import requests
-import urllib.request
-import urllib.parse
-
-import json
-
 import xml.etree.ElementTree as xmlet
-import lxml.etree as xmltree
-
-import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
-
-from skimage import io
-from PIL import Image as plimg
-from PIL import ImageDraw
-
-import matplotlib.pyplot as plt
-import matplotlib.ticker as mticker
-
-import cartopy.crs as ccrs
-import cartopy
-from cartopy.mpl.gridliner import LONGITUDE_FORMATTER, LATITUDE_FORMATTER
-import folium
-import mapbox_vector_tile
-
-from owslib.wms import WebMapService
-import geopandas as gpd
-from shapely.geometry import box
-import rasterio
-from rasterio.mask import mask
-from rasterio.warp import calculate_default_transform, reproject, Resampling
-from rasterio.plot import show
-import fiona
-
-from IPython.display import Image, display
 
 # WMS !
 wmsUrl = 'https://gibs.earthdata.nasa.gov/wms/epsg4326/best/wms.cgi?SERVICE=WMS&REQUEST=GetCapabilities'
 # Construct capability URL. ^
-response = requests.get(wmsUrl) # Request WMS capabilities.
-WmsXml = xmltree.fromstring(response.content)# Display capabilities XML in original format. Tag and content in one line.
-# print(xmltree.tostring(WmsXml, pretty_print = True, encoding = str))
-WmsTree = xmlet.fromstring(response.content) # Coverts response to XML tree.
+_WmsTree = None
+
+def getWmsTree():
+    # capabilities are only requested the first time they're needed,
+    #  so importing this file stays offline
+    global _WmsTree
+    if _WmsTree is None:
+        import requests
+        response = requests.get(wmsUrl) # Request WMS capabilities.
+        _WmsTree = xmlet.fromstring(response.content) # Coverts response to XML tree.
+    return _WmsTree
 
 layer_keys = {
     # Primary Forest/Vegetation Indicators
@@ -107,7 +76,7 @@ def getCapabilitiesWMS():
     layerNumber = 0
 
     # Parse XML.
-    for child in WmsTree.iter():
+    for child in getWmsTree().iter():
         for layer in child.findall("./{http://www.opengis.net/wms}Capability/{http://www.opengis.net/wms}Layer//*/"): 
             if layer.tag == '{http://www.opengis.net/wms}Layer': 
                 f = layer.find("{http://www.opengis.net/wms}Name")
@@ -127,7 +96,7 @@ def layerAttributesWMS(key):
     layerName = key 
 
     # Get general information of WMS.
-    for child in WmsTree.iter():
+    for child in getWmsTree().iter():
         if child.tag == '{http://www.opengis.net/wms}WMS_Capabilities': 
             print('Version: ' +child.get('version'))
         
@@ -151,7 +120,7 @@ def layerAttributesWMS(key):
                     break
 
     # Get layer attributes.
-    for child in WmsTree.iter():
+    for child in getWmsTree().iter():
         for layer in child.findall("./{http://www.opengis.net/wms}Capability/{http://www.opengis.net/wms}Layer//*/"): 
             if layer.tag == '{http://www.opengis.net/wms}Layer': 
                 f = layer.find("{http://www.opengis.net/wms}Name")
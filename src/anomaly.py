@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from file_handling import df2csv, df2geojson
+
+COLUMNS = ['ndvi', 'evi', 'sar_ratio_db']
+
+
+class Climatology():
+    """
+    Running per-(id, calendar month) mean/variance (Welford) kept on disk.
+    - path: .npz store, created on first save
+    - columns: variables tracked, defaults to ndvi, evi and sar_ratio_db
+    Each update touches only the cells in the incoming month, so the cost is
+    O(cells) no matter how many years are already folded in.
+    """
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = list(columns or COLUMNS)
+
+        if os.path.exists(path):
+            store = np.load(path, allow_pickle=False)
+            if list(store['columns']) != self.columns:
+                raise ValueError(f"{path} tracks {list(store['columns'])}, "
+                                 f"not {self.columns}")
+            self.ids = store['ids']
+            self.count = store['count']
+            self.mean = store['mean']
+            self.m2 = store['m2']
+            self.months_seen = list(store['months_seen'])
+        else:
+            self.ids = np.empty(0, dtype='int64')
+            shape = (0, 12, len(self.columns))
+            self.count = np.zeros(shape, dtype='int32')
+            self.mean = np.zeros(shape, dtype='float64')
+            self.m2 = np.zeros(shape, dtype='float64')
+            self.months_seen = []
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        np.savez_compressed(self.path, columns=np.array(self.columns),
+                            ids=self.ids, count=self.count,
+                            mean=self.mean, m2=self.m2,
+                            months_seen=np.array(self.months_seen, dtype=str))
+        return self
+
+    def _rows(self, ids):
+        # map cell ids to rows of the store, growing it for unseen cells
+        new = np.setdiff1d(ids, self.ids)
+        if len(new):
+            merged = np.union1d(self.ids, new)
+            old_rows = np.searchsorted(merged, self.ids)
+            shape = (len(merged), 12, len(self.columns))
+            for name, dtype in (('count', 'int32'), ('mean', 'float64'),
+                                ('m2', 'float64')):
+                grown = np.zeros(shape, dtype=dtype)
+                grown[old_rows] = getattr(self, name)
+                setattr(self, name, grown)
+            self.ids = merged
+        return np.searchsorted(self.ids, ids)
+
+    def _values(self, month_df):
+        # one observation per cell for the month
+        month_df = month_df.copy()
+        if 'sar_ratio_db' in self.columns and 'sar_ratio_db' not in month_df:
+            epsilon = 1e-6
+            month_df['sar_ratio_db'] = 10 * np.log10(
+                month_df['sar_vh'] / (month_df['sar_vv'] + epsilon))
+        cells = month_df.groupby('id', as_index=False)[self.columns].mean()
+        return cells['id'].to_numpy(dtype='int64'), cells[self.columns].to_numpy(dtype='float64')
+
+    def score(self, month_df, month, min_count=5):
+        # z-scores against the climatology as it stood before this month
+        ids, x = self._values(month_df)
+        z = np.full(x.shape, np.nan)
+
+        known = np.isin(ids, self.ids)
+        rows = np.searchsorted(self.ids, ids[known])
+        n = self.count[rows, month - 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(self.m2[rows, month - 1] / (n - 1))
+            z_known = (x[known] - self.mean[rows, month - 1]) / std
+        z_known[(n < min_count) | (std == 0)] = np.nan
+        z[known] = z_known
+
+        scores = pd.DataFrame(z, columns=[f"{c}_z" for c in self.columns])
+        scores.insert(0, 'id', ids)
+        return scores
+
+    def update(self, month_df, month):
+        ids, x = self._values(month_df)
+        rows = self._rows(ids)
+        seen = ~np.isnan(x)
+
+        n = self.count[rows, month - 1]
+        mean = self.mean[rows, month - 1]
+        m2 = self.m2[rows, month - 1]
+
+        # Welford step, only where the cell has a value this month
+        n_new = n + seen
+        delta = np.where(seen, x - mean, 0.0)
+        mean_new = mean + np.divide(delta, n_new, out=np.zeros_like(delta),
+                                    where=n_new > 0)
+        m2_new = m2 + delta * np.where(seen, x - mean_new, 0.0)
+
+        self.count[rows, month - 1] = n_new
+        self.mean[rows, month - 1] = mean_new
+        self.m2[rows, month - 1] = m2_new
+        return self
+
+
+def detectDisturbance(clim, month_df, date, z_thres=-2.5, min_count=5):
+    """
+    Scores one month of samples, folds it into the climatology and returns
+    the disturbance candidates.
+    - month_df: rows for a single month (id, lat, long + tracked columns)
+    - date: 'YYYY-MM-DD' of that month; months already folded in are skipped
+    - z_thres: a drop below this many std devs flags a cell
+    """
+    month = pd.Timestamp(date).month
+    if date in clim.months_seen:
+        print(f"  {date} already in climatology, skipping")
+        return None
+
+    scores = clim.score(month_df, month, min_count)
+    clim.update(month_df, month)
+    clim.months_seen.append(date)
+
+    z_cols = [f"{c}_z" for c in clim.columns]
+    flagged = scores[(scores[z_cols] <= z_thres).any(axis=1)].copy()
+    flagged['date'] = date
+    flagged['n_flags'] = (flagged[z_cols] <= z_thres).sum(axis=1)
+
+    coords = month_df.groupby('id', as_index=False)[['lat', 'long']].first()
+    alerts = coords.merge(flagged, on='id', how='inner')
+    alerts = alerts.sort_values(z_cols[0]).reset_index(drop=True)
+
+    print(f"  {date}: {len(scores)} cells scored, {len(alerts)} flagged")
+    return alerts
+
+
+if __name__ == '__main__':
+
+    # usage: anomaly.py <samples.csv> [store.npz]
+    #  folds each month of the csv in date order and writes alerts per month
+    samples = pd.read_csv(sys.argv[1])
+    store = sys.argv[2] if len(sys.argv) > 2 else 'data/climatology.npz'
+    clim = Climatology(store)
+
+    for date, month_df in samples.groupby('date', sort=True):
+        alerts = detectDisturbance(clim, month_df, date)
+        if alerts is not None and len(alerts):
+            df2csv(alerts, f"alerts_{date}", 'data/alerts')
+            df2geojson(alerts, f"alerts_{date}", 'data/alerts')
+    clim.save()
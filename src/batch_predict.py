@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import glob
+import time
+import pickle
+import numpy as np
+import pandas as pd
+import rasterio
+
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+
+def gridShape(bbox, grid_res=0.05):
+    # same axes as createGridPoints in main.py, so cell ids line up
+    #  with anything sampled through getMultiSensorData
+    min_long, min_lat, max_long, max_lat = bbox
+    longs = np.arange(min_long, max_long, grid_res)
+    lats = np.arange(min_lat, max_lat, grid_res)
+    return longs, lats
+
+
+def createGridTiles(bbox, grid_res=0.05, tile_size=256):
+    """
+    Lazily yields square tiles of the sampling grid over a bbox.
+    - Cell ids follow createGridPoints: id = lat_idx * n_cols + long_idx
+    - Each tile is a dict of its tile row/col, index window and cell frame,
+      built only when the tile is pulled off the generator.
+    """
+    longs, lats = gridShape(bbox, grid_res)
+    n_cols, n_rows = len(longs), len(lats)
+
+    for lat0 in range(0, n_rows, tile_size):
+        for long0 in range(0, n_cols, tile_size):
+            lat_idx = np.arange(lat0, min(lat0 + tile_size, n_rows))
+            long_idx = np.arange(long0, min(long0 + tile_size, n_cols))
+            long_grid, lat_grid = np.meshgrid(long_idx, lat_idx)
+
+            cells = pd.DataFrame({
+                'id': (lat_grid * n_cols + long_grid).ravel(),
+                'long': longs[long_grid.ravel()],
+                'lat': lats[lat_grid.ravel()],
+            })
+            yield {
+                'row': lat0 // tile_size,
+                'col': long0 // tile_size,
+                'lat0': lat0, 'long0': long0,
+                'n_lat': len(lat_idx), 'n_long': len(long_idx),
+                'cells': cells,
+            }
+
+
+class FeatureStore():
+    # local feature store: one csv per grid tile under `root`,
+    #  so a tile's features can be read without scanning the whole grid
+
+    def __init__(self, root, bbox, grid_res=0.05, tile_size=256):
+        self.root = root
+        self.bbox = bbox
+        self.grid_res = grid_res
+        longs, lats = gridShape(bbox, grid_res)
+        self.n_cols, self.n_rows = len(longs), len(lats)
+        self.tile_size = tile_size
+
+    def gridIndex(self, df):
+        # grid row/col of each sample from its lat/long, never its id:
+        #  ids from other bboxes (e.g. per-region job queue output) don't
+        #  line up with this grid. Rows off the grid come back as -1.
+        lat_idx = np.rint((df['lat'].to_numpy() - self.bbox[1])
+                          / self.grid_res).astype('int64')
+        long_idx = np.rint((df['long'].to_numpy() - self.bbox[0])
+                           / self.grid_res).astype('int64')
+        outside = ((lat_idx < 0) | (lat_idx >= self.n_rows) |
+                   (long_idx < 0) | (long_idx >= self.n_cols))
+        lat_idx[outside] = -1
+        long_idx[outside] = -1
+        return lat_idx, long_idx
+
+    def tilePath(self, row, col):
+        return os.path.join(self.root, f"tile_{row}_{col}.csv")
+
+    def partition(self, csv_path, chunksize=200_000):
+        # split a flat feature csv (e.g. from df2csv) into per-tile files
+        #  in a single chunked pass, memory stays at one chunk
+        os.makedirs(self.root, exist_ok=True)
+        for path in glob.glob(os.path.join(self.root, 'tile_*.csv')):
+            os.remove(path)
+
+        n_rows = n_outside = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            lat_idx, long_idx = self.gridIndex(chunk)
+            inside = lat_idx >= 0
+            n_outside += int((~inside).sum())
+            chunk, lat_idx, long_idx = chunk[inside], lat_idx[inside], long_idx[inside]
+
+            # re-key on this grid so ids agree with createGridTiles;
+            #  the sampled id is kept alongside for tracing back
+            if 'id' in chunk:
+                chunk = chunk.rename(columns={'id': 'source_id'})
+            chunk.insert(0, 'id', lat_idx * self.n_cols + long_idx)
+
+            tile_row = lat_idx // self.tile_size
+            tile_col = long_idx // self.tile_size
+            for (row, col), part in chunk.groupby([tile_row, tile_col]):
+                path = self.tilePath(row, col)
+                part.to_csv(path, mode='a', index=False,
+                            header=not os.path.exists(path))
+            n_rows += len(chunk)
+
+        print(f"  Partitioned {n_rows} feature rows into {self.root}/")
+        if n_outside:
+            print(f"  Dropped {n_outside} rows outside bbox {self.bbox}")
+        return self
+
+    def fetch(self, row, col, chunksize=None):
+        # with chunksize, an iterator of frames instead of the whole tile
+        path = self.tilePath(row, col)
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path, chunksize=chunksize)
+
+
+def featureColumns(model, columns=None):
+    # explicit columns win, otherwise whatever the model was fit on
+    columns = list(columns or getattr(model, 'feature_names_in_', []))
+    if not columns:
+        raise ValueError("Can't tell which feature columns to score: the model "
+                         "has no feature_names_in_, pass columns explicitly")
+    return columns
+
+
+# each worker loads the model once, not once per tile
+_model = None
+_columns = None
+
+def _initWorker(model_path, columns):
+    global _model, _columns
+    with open(model_path, 'rb') as f:
+        _model = pickle.load(f)
+    _columns = columns
+
+
+def _score(X):
+    if not hasattr(_model, 'feature_names_in_'):
+        # fit on a bare array; named columns would only make sklearn warn
+        X = X.to_numpy()
+    if hasattr(_model, 'predict_proba'):
+        # probability of the positive (loss) class
+        return _model.predict_proba(X)[:, -1]
+    return _model.predict(X)
+
+
+def scoreTile(tile, store, out_dir, chunk_size=50_000):
+    chunks = store.fetch(tile['row'], tile['col'], chunksize=chunk_size)
+    if chunks is None:
+        return tile, {}, 0, 0
+
+    # the tile file is streamed chunk_size rows at a time; each chunk is
+    #  scored, appended to its date partitions and dropped into the
+    #  per-date raster blocks before the next one is read
+    keep = ['id', 'long', 'lat', 'date', 'risk']
+    name = f"tile_{tile['row']}_{tile['col']}.csv"
+    windows = {}
+    cells = set()
+    n_rows = 0
+
+    for features in chunks:
+        features = features.dropna(subset=_columns)
+        # pixel within the tile from lat/long, same as partition()
+        lat_idx, long_idx = store.gridIndex(features)
+        lat_idx = lat_idx - tile['lat0']
+        long_idx = long_idx - tile['long0']
+        inside = ((lat_idx >= 0) & (lat_idx < tile['n_lat']) &
+                  (long_idx >= 0) & (long_idx < tile['n_long']))
+        features = features[inside].assign(_lat_idx=lat_idx[inside],
+                                           _long_idx=long_idx[inside])
+        if features.empty:
+            continue
+        features['risk'] = _score(features[_columns]).astype('float32')
+
+        for date, part in features.groupby('date'):
+            part_dir = os.path.join(out_dir, 'table', f"date={date}")
+            # first chunk for a date overwrites whatever a previous run left
+            first = date not in windows
+            if first:
+                os.makedirs(part_dir, exist_ok=True)
+                windows[date] = np.full((tile['n_lat'], tile['n_long']),
+                                        np.nan, dtype='float32')
+            part[keep].to_csv(os.path.join(part_dir, name), index=False,
+                              mode='w' if first else 'a', header=first)
+
+            windows[date][part['_lat_idx'].to_numpy(),
+                          part['_long_idx'].to_numpy()] = part['risk'].to_numpy()
+
+        cells.update(features['id'].tolist())
+        n_rows += len(features)
+
+    return tile, windows, len(cells), n_rows
+
+
+def _openRaster(path, bbox, grid_res):
+    longs, lats = gridShape(bbox, grid_res)
+    # grid points are cell centres; rows run north to south in the raster
+    transform = from_origin(longs[0] - grid_res / 2,
+                            lats[-1] + grid_res / 2,
+                            grid_res, grid_res)
+    return rasterio.open(
+        path, 'w', driver='GTiff',
+        height=len(lats), width=len(longs), count=1,
+        dtype='float32', nodata=np.nan, crs='EPSG:4326',
+        transform=transform, tiled=True, compress='deflate',
+        blockxsize=256, blockysize=256, BIGTIFF='IF_SAFER')
+
+
+def predictGrid(model_path, store, bbox, out_dir,
+                grid_res=0.05, tile_size=256, chunk_size=50_000,
+                columns=None, workers=None):
+    """
+    Wall-to-wall risk prediction over a bbox.
+    - model_path: pickled estimator with predict_proba or predict
+    - store: FeatureStore partitioned on the same bbox/grid_res/tile_size
+    - out_dir: gets table/date=YYYY-MM-DD/tile_r_c.csv and risk_<date>.tif
+    - columns: feature columns, defaults to the model's feature_names_in_
+    At most two tiles per worker are in flight. Each tile file is read
+    chunk_size rows at a time, so a worker holds one chunk plus a float32
+    tile_size x tile_size block per date, never a whole tile of features.
+    """
+    with open(model_path, 'rb') as f:
+        columns = featureColumns(pickle.load(f), columns)
+
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count()
+    _, lats = gridShape(bbox, grid_res)
+    n_rows = len(lats)
+
+    rasters = {}
+    n_cells = n_scored = 0
+    started = time.time()
+
+    tiles = createGridTiles(bbox, grid_res, tile_size)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_initWorker,
+                             initargs=(model_path, columns)) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # keep at most 2 tiles per worker in flight
+            while not exhausted and len(pending) < workers * 2:
+                tile = next(tiles, None)
+                if tile is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(scoreTile, tile, store,
+                                        out_dir, chunk_size))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                tile, windows, cells, rows = future.result()
+                for date, block in windows.items():
+                    if date not in rasters:
+                        rasters[date] = _openRaster(
+                            os.path.join(out_dir, f"risk_{date}.tif"),
+                            bbox, grid_res)
+                    # flip tile so northern rows come first
+                    window = Window(tile['long0'],
+                                    n_rows - tile['lat0'] - tile['n_lat'],
+                                    tile['n_long'], tile['n_lat'])
+                    rasters[date].write(block[::-1], 1, window=window)
+
+                n_cells += cells
+                n_scored += rows
+                elapsed = time.time() - started
+                if cells:
+                    print(f"  tile {tile['row']},{tile['col']}: {cells} cells "
+                          f"| {n_cells / elapsed:,.0f} cells/sec")
+
+    for raster in rasters.values():
+        raster.close()
+
+    elapsed = time.time() - started
+    print(f"\n  Scored {n_cells} cells ({n_scored} cell-months) "
+          f"in {elapsed:.1f}s")
+    print(f"  Throughput: {n_cells / elapsed:,.0f} cells/sec, "
+          f"{n_scored / elapsed:,.0f} cell-months/sec")
+    print(f"  Output: {out_dir}/\n")
+
+    return {'cells': n_cells, 'rows': n_scored, 'seconds': elapsed,
+            'rasters': sorted(rasters)}
+
+
+if __name__ == '__main__':
+
+    nigeria_bbox = [2.67, 4.27, 14.68, 13.89]
+    grid_res = 0.01
+
+    if len(sys.argv) < 3:
+        print("usage: batch_predict.py <model.pkl> <features.csv>")
+        sys.exit(1)
+
+    store = FeatureStore('data/feature_store', nigeria_bbox, grid_res)
+    store.partition(sys.argv[2])
+    predictGrid(sys.argv[1], store, nigeria_bbox,
+                'data/predictions', grid_res=grid_res)
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
 import os
+import json
 
 def df2csv(df, filename=None, data_dir='data'):
    
     if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
+        os.makedirs(data_dir, exist_ok=True)
         print(f"Created directory: {data_dir}/")
     
     # Generate filename
@@ -29,4 +30,38 @@ def df2csv(df, filename=None, data_dir='data'):
     print(f"  {filepath}")
     print(f"  Size: {file_size:.1f} KB\n")
     
-    return filepath
\ No newline at end of file
+    return filepath
+
+def df2geojson(df, filename=None, data_dir='data'):
+    # point features from the long/lat columns, every other column a property
+
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+        print(f"Created directory: {data_dir}/")
+
+    if filename is None:
+        filename = 'export'
+
+    if filename.endswith('.geojson'):
+        filename = filename[:-8]
+
+    filepath = os.path.join(data_dir, f"{filename}.geojson")
+
+    props = df.drop(columns=['long', 'lat'])
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [long, lat]},
+            # round-trip through pandas json so numpy types and NaN serialise
+            'properties': row,
+        }
+        for long, lat, row in zip(df['long'], df['lat'],
+                                  json.loads(props.to_json(orient='records')))
+    ]
+    with open(filepath, 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+
+    print(f"  Exported {len(df)} features to:")
+    print(f"  {filepath}\n")
+
+    return filepath
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from file_handling import df2csv
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS regions (
+    name        TEXT PRIMARY KEY,
+    bbox        TEXT NOT NULL,
+    grid_res    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    id          INTEGER PRIMARY KEY,
+    region      TEXT NOT NULL,
+    start_date  TEXT NOT NULL,
+    end_date    TEXT NOT NULL,
+    tile_row    INTEGER NOT NULL,
+    tile_col    INTEGER NOT NULL,
+    bbox        TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    rows        INTEGER,
+    seconds     REAL,
+    output      TEXT,
+    error       TEXT,
+    updated_at  REAL,
+    UNIQUE (region, start_date, end_date, tile_row, tile_col)
+)
+"""
+
+
+def dateChunks(start_date, end_date, chunk_months=12):
+    # month-aligned [start, end] ranges, end inclusive like compose()
+    current = datetime.strptime(start_date, '%Y-%m-%d')
+    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    while current <= end_dt:
+        nxt = current + relativedelta(months=chunk_months)
+        chunk_end = min(nxt - timedelta(days=1), end_dt)
+        yield current.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')
+        current = nxt
+
+
+def bboxTiles(bbox, grid_res=0.05, tile_cells=20):
+    # split a bbox into sub-bboxes of tile_cells x tile_cells grid points,
+    #  aligned so createGridPoints on each tile lands on the region's grid
+    min_long, min_lat, max_long, max_lat = bbox
+    n_cols = len(np.arange(min_long, max_long, grid_res))
+    n_rows = len(np.arange(min_lat, max_lat, grid_res))
+    step = tile_cells * grid_res
+
+    for row, lat0 in enumerate(range(0, n_rows, tile_cells)):
+        for col, long0 in enumerate(range(0, n_cols, tile_cells)):
+            t_min_long = min_long + long0 * grid_res
+            t_min_lat = min_lat + lat0 * grid_res
+            # stop half a cell short so float error can't add an extra point
+            yield row, col, [
+                t_min_long, t_min_lat,
+                min(t_min_long + step - grid_res / 2, max_long),
+                min(t_min_lat + step - grid_res / 2, max_lat),
+            ]
+
+
+class RequestBudget():
+    # token bucket shared by every worker, refilled at per_minute/60 per sec
+
+    def __init__(self, per_minute=600):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n=1):
+        n = min(n, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class JobQueue():
+    """
+    SQLite-backed queue of getMultiSensorData work units.
+    - db_path: queue file, safe to reopen after a crash or ctrl-c
+    - out_dir: each finished unit is written to out_dir/<region>/ as a csv
+    A unit is one (region, date range, grid tile); units marked done are
+    never run again, units left running by a dead process go back to pending.
+    """
+
+    def __init__(self, db_path='data/jobs.sqlite', out_dir='data/jobs'):
+        self.db_path = db_path
+        self.out_dir = out_dir
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        # one connection per thread; sqlite handles the locking between them
+        return sqlite3.connect(self.db_path, timeout=60)
+
+    def enqueue(self, regions, start_date, end_date,
+                grid_res=0.05, chunk_months=12, tile_cells=20):
+        # regions: {'edo': [min_long, min_lat, max_long, max_lat], ...}
+        # already queued units are left alone, so re-enqueueing is harmless
+        units = [
+            (name, start, end, row, col, ','.join(f"{v:.6f}" for v in tile))
+            for name, bbox in regions.items()
+            for start, end in dateChunks(start_date, end_date, chunk_months)
+            for row, col, tile in bboxTiles(bbox, grid_res, tile_cells)
+        ]
+        with self._connect() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO regions (name, bbox, grid_res) '
+                'VALUES (?, ?, ?)',
+                [(name, ','.join(str(v) for v in bbox), grid_res)
+                 for name, bbox in regions.items()])
+            before = db.total_changes
+            db.executemany(
+                'INSERT OR IGNORE INTO units '
+                '(region, start_date, end_date, tile_row, tile_col, bbox) '
+                'VALUES (?, ?, ?, ?, ?, ?)', units)
+            added = db.total_changes - before
+        # made up front so workers finishing together don't race on makedirs
+        for name in regions:
+            os.makedirs(os.path.join(self.out_dir, name), exist_ok=True)
+        print(f"Queued {added} new units ({len(units) - added} already known)")
+        return added
+
+    def _claim(self, max_attempts=3, backoff=30):
+        # next pending unit, or a failed one with attempts left whose
+        #  backoff (backoff * 2^(attempts-1) seconds since it failed) is up.
+        # Returns (unit, n_waiting); n_waiting counts retryable units that
+        #  aren't due yet, so workers know whether to wait or stop.
+        now = time.time()
+        db = self._connect()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            unit = db.execute(
+                "SELECT id, region, start_date, end_date, tile_row, tile_col, bbox "
+                "FROM units WHERE status = 'pending' OR (status = 'failed' "
+                "AND attempts < ? AND updated_at + ? * (1 << (attempts - 1)) <= ?) "
+                "ORDER BY status = 'failed', id LIMIT 1",
+                (max_attempts, backoff, now)).fetchone()
+            if unit:
+                db.execute(
+                    "UPDATE units SET status = 'running', "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (now, unit[0]))
+                waiting = 0
+            else:
+                waiting = db.execute(
+                    "SELECT COUNT(*) FROM units "
+                    "WHERE status = 'failed' AND attempts < ?",
+                    (max_attempts,)).fetchone()[0]
+            db.commit()
+        finally:
+            db.close()
+        return unit, waiting
+
+    def _finish(self, unit_id, status, rows=None, seconds=None,
+                output=None, error=None):
+        with self._connect() as db:
+            db.execute(
+                'UPDATE units SET status = ?, rows = ?, seconds = ?, '
+                'output = ?, error = ?, updated_at = ? WHERE id = ?',
+                (status, rows, seconds, output, error, time.time(), unit_id))
+
+    def _region(self, name):
+        with self._connect() as db:
+            bbox, grid_res = db.execute(
+                'SELECT bbox, grid_res FROM regions WHERE name = ?',
+                (name,)).fetchone()
+        return [float(v) for v in bbox.split(',')], grid_res
+
+    def _runUnit(self, unit, fetch, budget, kwargs):
+        unit_id, region, start, end, row, col, bbox = unit
+        bbox = [float(v) for v in bbox.split(',')]
+        region_bbox, grid_res = self._region(region)
+
+        # compose makes one static call plus two per month
+        n_months = len(list(dateChunks(start, end, 1)))
+        budget.acquire(1 + 2 * n_months)
+
+        started = time.time()
+        try:
+            df = fetch(bbox, start, end, grid_res=grid_res, **kwargs)
+            if df is None:
+                # getMultiSensorData's error signal (no grid, or no months
+                #  sampled); fail so the retry path picks the unit up again
+                raise RuntimeError("fetch returned no data")
+            rows, output = 0, None
+            if len(df):
+                # createGridPoints numbers each tile from 0; make ids global
+                #  to the region grid so tiles can be concatenated
+                n_cols = len(np.arange(region_bbox[0], region_bbox[2], grid_res))
+                lat_idx = np.rint((df['lat'] - region_bbox[1]) / grid_res)
+                long_idx = np.rint((df['long'] - region_bbox[0]) / grid_res)
+                df['id'] = (lat_idx * n_cols + long_idx).astype('int64')
+                df['region'] = region
+                output = df2csv(df, f"{start}_{end}_tile_{row}_{col}",
+                                os.path.join(self.out_dir, region))
+                rows = len(df)
+        except Exception as e:
+            self._finish(unit_id, 'failed', seconds=time.time() - started,
+                         error=str(e))
+            print(f"  [{region}] {start}..{end} tile {row},{col} failed: {e}")
+            return region, False, 0
+        self._finish(unit_id, 'done', rows, time.time() - started, output)
+        return region, True, rows
+
+    def run(self, fetch, workers=4, budget=None, max_attempts=3,
+            backoff=30, **kwargs):
+        """
+        Works the queue until no pending or retryable units are left.
+        - fetch: getMultiSensorData, or anything with the same signature
+        - workers: threads sharing one Earth Engine session
+        - budget: RequestBudget shared by all workers (600 req/min default)
+        - max_attempts: failed units are retried in this same run until
+          they have been tried this many times
+        - backoff: seconds before the first retry, doubling on each one
+        - kwargs: passed through to fetch (scale, include_elevation, ...)
+        """
+        budget = budget or RequestBudget()
+        with self._connect() as db:
+            # anything 'running' belongs to a process that died mid-unit
+            db.execute("UPDATE units SET status = 'pending' "
+                       "WHERE status = 'running'")
+            # a fresh run retries earlier failures straight away
+            db.execute("UPDATE units SET status = 'pending' "
+                       "WHERE status = 'failed' AND attempts < ?",
+                       (max_attempts,))
+
+        started = time.time()
+        done = {}
+
+        def worker():
+            while True:
+                unit, waiting = self._claim(max_attempts, backoff)
+                if unit is None:
+                    if not waiting:
+                        return
+                    # only failed units in backoff left; poll until one is due
+                    time.sleep(min(1, backoff))
+                    continue
+                region, ok, rows = self._runUnit(unit, fetch, budget, kwargs)
+                with lock:
+                    done[region] = done.get(region, 0) + ok
+                    elapsed = time.time() - started
+                    print(f"  [{region}] {done[region]} units this run, "
+                          f"{rows} rows | {sum(done.values()) / elapsed * 60:.1f} "
+                          f"units/min overall")
+
+        lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(worker) for _ in range(workers)]:
+                future.result()
+
+        return self.progress()
+
+    def progress(self):
+        # per-region completion and throughput, straight from the queue
+        with self._connect() as db:
+            stats = pd.read_sql_query(
+                "SELECT region, COUNT(*) AS units, "
+                "SUM(status = 'done') AS done, "
+                "SUM(status = 'failed') AS failed, "
+                "SUM(status = 'pending') AS pending, "
+                "SUM(COALESCE(rows, 0)) AS rows, "
+                "SUM(CASE WHEN status = 'done' THEN seconds END) AS seconds "
+                "FROM units GROUP BY region ORDER BY region", db)
+        stats['pct_done'] = 100 * stats['done'] / stats['units']
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds']
+        print(stats.to_string(index=False), "\n")
+        return stats
+
+
+if __name__ == '__main__':
+
+    from main import startEarthEngine, getMultiSensorData
+
+    # regions csv: name,min_long,min_lat,max_long,max_lat
+    if len(sys.argv) > 1:
+        regions = {r['name']: [r['min_long'], r['min_lat'],
+                               r['max_long'], r['max_lat']]
+                   for r in pd.read_csv(sys.argv[1]).to_dict('records')}
+    else:
+        regions = {'edo': [5.00, 5.74, 6.66, 7.60]}
+
+    startEarthEngine()
+    queue = JobQueue()
+    queue.enqueue(regions, '2020-01-01', '2024-01-31')
+    queue.run(getMultiSensorData, workers=4)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+# single entry point for the pipeline:
+#   python src/luca.py <fetch|download|features|split|qa|predict|alerts|startup> ...
+# nothing heavy is imported here; each subcommand pulls in its own
+#  modules (and Earth Engine) only when it runs, so `--help` and the
+#  local csv steps start fast and work offline
+
+import os
+import sys
+import argparse
+import importlib.util
+import subprocess
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+GIBS_DIR = os.path.join(os.path.dirname(SRC_DIR), 'nasa_gibs')
+
+EDO_BBOX = [5.00, 5.74, 6.66, 7.60]
+
+def _gibsModule(filename):
+    # nasa_gibs scripts aren't a package (and some have hyphenated names)
+    sys.path.insert(0, GIBS_DIR)
+    name = os.path.splitext(filename)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(GIBS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def fetch(args):
+    from main import startEarthEngine, getMultiSensorData
+    from job_queue import JobQueue
+
+    if args.regions:
+        import pandas as pd
+        regions = {r['name']: [r['min_long'], r['min_lat'],
+                               r['max_long'], r['max_lat']]
+                   for r in pd.read_csv(args.regions).to_dict('records')}
+    else:
+        regions = {args.name: args.bbox}
+
+    # before touching the queue, so a missing or unauthorised Earth Engine
+    #  fails fast instead of after every unit has been enqueued
+    startEarthEngine()
+    queue = JobQueue(args.db, args.out)
+    queue.enqueue(regions, args.start, args.end, grid_res=args.grid_res,
+                  chunk_months=args.chunk_months, tile_cells=args.tile_cells)
+    queue.run(getMultiSensorData, workers=args.workers, scale=args.scale)
+
+
+def download(args):
+    gibs = _gibsModule('data-download.py')
+    bbox = ','.join(str(v) for v in args.bbox)
+    for layer in args.layers or gibs.layer_keys:
+        gibs.download_wms_layer(layer, args.start, args.end, bbox,
+                                os.path.join(args.out, layer),
+                                interval_days=args.interval_days)
+
+
+def features(args):
+    from process_data import Dataset
+    from file_handling import df2csv
+
+    forest = Dataset(None, get=args.input)
+    forest.newFeatures().temporal_interpolate(columns=args.columns).tidy()
+    df2csv(forest.df, args.name, args.out)
+
+
+def split(args):
+    import pandas as pd
+    from process_data import stratifiedSplit
+    from file_handling import df2csv
+
+    train, test = stratifiedSplit(pd.read_csv(args.input), label=args.label,
+                                  test_size=args.test_size)
+    df2csv(train, f"{args.name}_train", args.out)
+    df2csv(test, f"{args.name}_test", args.out)
+
+
+def qa(args):
+    batch_qa = _gibsModule('batch_qa.py')
+    batch_qa.runQA(args.root, workers=args.workers,
+                   quicklook_px=args.quicklook_px)
+
+
+def predict(args):
+    from batch_predict import FeatureStore, predictGrid
+
+    store = FeatureStore(args.store, args.bbox, args.grid_res, args.tile_size)
+    if args.features:
+        store.partition(args.features)
+    predictGrid(args.model, store, args.bbox, args.out,
+                grid_res=args.grid_res, tile_size=args.tile_size,
+                chunk_size=args.chunk_size, columns=args.columns,
+                workers=args.workers)
+
+
+def alerts(args):
+    import pandas as pd
+    from anomaly import Climatology, detectDisturbance
+    from file_handling import df2csv, df2geojson
+
+    clim = Climatology(args.store)
+    samples = pd.read_csv(args.input)
+    for date, month_df in samples.groupby('date', sort=True):
+        found = detectDisturbance(clim, month_df, date, z_thres=args.z_thres)
+        if found is not None and len(found):
+            df2csv(found, f"alerts_{date}", args.out)
+            df2geojson(found, f"alerts_{date}", args.out)
+    clim.save()
+
+
+def startup(args):
+    # thin wrapper around the import-time budget test
+    test = os.path.join(os.path.dirname(SRC_DIR), 'tests', 'test_startup.py')
+    sys.exit(subprocess.call([sys.executable, '-m', 'pytest', '-q', test]))
+
+
+def buildParser():
+    parser = argparse.ArgumentParser(
+        prog='luca', description='Land Use Classification Algorithm pipeline')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    cmd = sub.add_parser('fetch', help='sample Earth Engine data through the job queue')
+    cmd.add_argument('--bbox', type=float, nargs=4, default=EDO_BBOX,
+                     metavar=('MIN_LONG', 'MIN_LAT', 'MAX_LONG', 'MAX_LAT'))
+    cmd.add_argument('--name', default='edo', help='region name for --bbox')
+    cmd.add_argument('--regions', help='csv of name,min_long,min_lat,max_long,max_lat')
+    cmd.add_argument('--start', default='2020-01-01')
+    cmd.add_argument('--end', default='2024-01-31')
+    cmd.add_argument('--grid-res', type=float, default=0.05)
+    cmd.add_argument('--scale', type=int, default=500)
+    cmd.add_argument('--chunk-months', type=int, default=12)
+    cmd.add_argument('--tile-cells', type=int, default=20)
+    cmd.add_argument('--workers', type=int, default=4)
+    cmd.add_argument('--db', default='data/jobs.sqlite')
+    cmd.add_argument('--out', default='data/jobs')
+    cmd.set_defaults(func=fetch)
+
+    cmd = sub.add_parser('download', help='download GIBS WMS rasters')
+    cmd.add_argument('layers', nargs='*', help='layer keys, all if omitted')
+    cmd.add_argument('--bbox', type=float, nargs=4, default=EDO_BBOX,
+                     metavar=('MIN_LONG', 'MIN_LAT', 'MAX_LONG', 'MAX_LAT'))
+    cmd.add_argument('--start', default='2020-01-01')
+    cmd.add_argument('--end', default='2024-01-01')
+    cmd.add_argument('--interval-days', type=int, default=30)
+    cmd.add_argument('--out', default='./data/edo_test')
+    cmd.set_defaults(func=download)
+
+    cmd = sub.add_parser('features', help='engineer and interpolate features from a csv')
+    cmd.add_argument('input')
+    cmd.add_argument('--columns', nargs='+',
+                     default=['ndvi', 'evi', 'ndvi_std',
+                              'lst_k', 'lst_std', 'precip_total_mm'])
+    cmd.add_argument('--name', default='forest2')
+    cmd.add_argument('--out', default='./data')
+    cmd.set_defaults(func=features)
+
+    cmd = sub.add_parser('split', help='stratified train/test split of a csv')
+    cmd.add_argument('input')
+    cmd.add_argument('--label', default='forest_loss')
+    cmd.add_argument('--test-size', type=float, default=0.2)
+    cmd.add_argument('--name', default='forest')
+    cmd.add_argument('--out', default='./data')
+    cmd.set_defaults(func=split)
+
+    cmd = sub.add_parser('qa', help='QA index and quick-looks for downloaded tiffs')
+    cmd.add_argument('root', nargs='?', default='./data/edo_test')
+    cmd.add_argument('--workers', type=int)
+    cmd.add_argument('--quicklook-px', type=int, default=256)
+    cmd.set_defaults(func=qa)
+
+    cmd = sub.add_parser('predict', help='score a trained model over a grid')
+    cmd.add_argument('model', help='pickled estimator')
+    cmd.add_argument('--features', help='flat feature csv to partition first')
+    cmd.add_argument('--store', default='data/feature_store')
+    cmd.add_argument('--bbox', type=float, nargs=4, default=EDO_BBOX,
+                     metavar=('MIN_LONG', 'MIN_LAT', 'MAX_LONG', 'MAX_LAT'))
+    cmd.add_argument('--grid-res', type=float, default=0.05)
+    cmd.add_argument('--tile-size', type=int, default=256)
+    cmd.add_argument('--chunk-size', type=int, default=50_000)
+    cmd.add_argument('--columns', nargs='+',
+                     help="feature columns, if the model has no feature_names_in_")
+    cmd.add_argument('--workers', type=int)
+    cmd.add_argument('--out', default='data/predictions')
+    cmd.set_defaults(func=predict)
+
+    cmd = sub.add_parser('alerts', help='update the climatology and flag disturbances')
+    cmd.add_argument('input')
+    cmd.add_argument('--store', default='data/climatology.npz')
+    cmd.add_argument('--z-thres', type=float, default=-2.5)
+    cmd.add_argument('--out', default='data/alerts')
+    cmd.set_defaults(func=alerts)
+
+    cmd = sub.add_parser('startup', help='run the import-time budget test')
+    cmd.set_defaults(func=startup)
+
+    return parser
+
+
+def main(argv=None):
+    args = buildParser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,34 +1,38 @@
 #!/usr/bin/env python3
 
 import sys
-import ee
-import geemap
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-from pandas.plotting import scatter_matrix
-from datetime import datetime, timedelta
-from sklearn.model_selection import StratifiedShuffleSplit
 
 from file_handling import df2csv
-from  month_composite import compose
 from process_data import Dataset
 import process_data as p
 
+# Earth Engine (and compose, which needs it) is imported inside the
+#  functions that use it, so local csv processing works without it installed
+
 def startEarthEngine():
-    # authenticate Earth Engine and initialise API
-    ee.Authenticate()
+    # initialise API, only going through authentication when there
+    #  are no stored credentials to initialise with
     try:
-        ee.Initialize(project='sage-courier-474421-m9')
-    except Exception as e:
-        print(f"Could not start Earth Engine: {e}")
+        import ee
+    except ImportError:
+        print("Could not start Earth Engine: earthengine-api is not installed "
+              "(pip install earthengine-api)")
         sys.exit(1)
-    else:
-        print("\n✓ Earth Engine running :)\n")
+    try:
+        ee.Initialize(project='sage-courier-474421-m9')
+    except Exception:
+        try:
+            ee.Authenticate()
+            ee.Initialize(project='sage-courier-474421-m9')
+        except Exception as e:
+            print(f"Could not start Earth Engine: {e}")
+            sys.exit(1)
+    print("\n✓ Earth Engine running :)\n")
 
 def createGridPoints(bbox, grid_res=0.05, buffer_m=250):
+    import ee
     min_long, min_lat, max_long, max_lat = bbox
     longs = np.arange(min_long, max_long, grid_res)
     lats = np.arange(min_lat, max_lat, grid_res)
@@ -55,6 +59,8 @@ def createGridPoints(bbox, grid_res=0.05, buffer_m=250):
 def getMultiSensorData(bbox, start_date, end_date,
                         grid_res=0.05, scale=500,
                         ndvi_thres=-0.02, include_elevation=True):
+    import ee
+    from month_composite import compose
     region = ee.Geometry.Rectangle(bbox)
     start = ee.Date(start_date)
     end = ee.Date(end_date)
@@ -80,13 +86,13 @@ def getMultiSensorData(bbox, start_date, end_date,
 
 if __name__ == '__main__':
 
-    startEarthEngine()
     edo_bbox = [5.00, 5.74, 6.66, 7.60]
 
     # get mulltiSensor data commented out to reduce 
     #  computational overload during testsing
     #  will instead...
     raw_data = pd.read_csv('data/edo_test/test-a.csv')
+    # startEarthEngine()
     # try:
     #     raw_data = getMultiSensorData(
     #         edo_bbox,
@@ -100,21 +106,10 @@ if __name__ == '__main__':
     # else:
     # print("Samples collected successfully")
 
-    # categorise forest_loss by quartiles using pd.qcut
-    raw_data['loss_cat_q'] = pd.qcut(raw_data['forest_loss'], 
-                                     q=5, 
-                                     duplicates='drop')
-    # raw_data['loss_cat_q'] = raw_data['loss_cat_q'].cat.codes + 1
-
     # here im splitting off a portion of the data for testing later
         # but because the data is skewed, i want to make sure the split
         # is representative of the popution, so stratified split
-    split = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
-    for train_idx, test_idx in split.split(raw_data, raw_data['loss_cat_q']):
-        strat_trainingSet = raw_data.loc[train_idx]
-        strat_testingSet = raw_data.loc[test_idx]
-    for set_ in (strat_trainingSet, strat_testingSet):
-        set_.drop('loss_cat_q', axis=1, inplace=True)
+    strat_trainingSet, strat_testingSet = p.stratifiedSplit(raw_data)
 
     forest = Dataset(strat_trainingSet.copy()) # get cracking w the training set
     forest_csv = df2csv(forest.df,
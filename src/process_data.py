@@ -1,8 +1,21 @@
 import sys
 import pandas as pd
 import numpy as np
-from scipy.spatial import cKDTree, distance
-from scipy.spatial import distance
+
+def stratifiedSplit(data, label='forest_loss', q=5,
+                    test_size=0.2, random_state=42):
+    # the data is skewed, so split on quantile bins of `label`
+    #  to keep the test set representative of the population
+    from sklearn.model_selection import StratifiedShuffleSplit
+
+    data = data.reset_index(drop=True)
+    # categorise label by quantiles using pd.qcut
+    bins = pd.qcut(data[label], q=q, duplicates='drop')
+
+    split = StratifiedShuffleSplit(n_splits=1, test_size=test_size,
+                                   random_state=random_state)
+    train_idx, test_idx = next(split.split(data, bins))
+    return data.loc[train_idx], data.loc[test_idx]
 
 class Dataset():
 
@@ -64,7 +77,7 @@ class Dataset():
         # new feature for spatial proximity to forest loss
         self.dist_from_loss()
 
-        self.df.drop(['sar_vv', 'sar_vh'])
+        self.df = self.df.drop(columns=['sar_vv', 'sar_vh'], errors='ignore')
 
         return self
 
@@ -129,6 +142,8 @@ class Dataset():
         
 
     def dist_from_loss(self):
+            from scipy.spatial import distance
+
             # Ensure data sorted by time
             self.df = self.df.sort_values(by=['year', 'month']).reset_index(drop=True)
 
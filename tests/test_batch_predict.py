@@ -0,0 +1,64 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+rasterio = pytest.importorskip('rasterio')
+LinearRegression = pytest.importorskip('sklearn.linear_model').LinearRegression
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'src'))
+import batch_predict as bp
+
+
+def regionSamples(bbox, grid_res, date):
+    # what the job queue writes: ids count from 0 within each region
+    longs, lats = bp.gridShape(bbox, grid_res)
+    long_grid, lat_grid = np.meshgrid(longs, lats)
+    return pd.DataFrame({
+        'id': np.arange(long_grid.size),
+        'long': long_grid.ravel(),
+        'lat': lat_grid.ravel(),
+        'date': date,
+    })
+
+
+def test_cells_land_on_their_own_pixel(tmp_path):
+    grid_res = 0.05
+    national = [5.0, 5.0, 7.0, 7.0]
+    # two regions whose local ids collide, plus one row off the grid
+    samples = pd.concat([
+        regionSamples([5.0, 5.0, 5.5, 5.5], grid_res, '2020-01-01'),
+        regionSamples([6.2, 6.3, 6.6, 6.7], grid_res, '2020-01-01'),
+        pd.DataFrame({'id': [0], 'long': [9.0], 'lat': [9.0],
+                      'date': ['2020-01-01']}),
+    ], ignore_index=True)
+    # a feature that identifies the cell, and a model that returns it as-is
+    samples['code'] = samples['lat'] * 1000 + samples['long']
+    samples.to_csv(tmp_path / 'features.csv', index=False)
+
+    model = LinearRegression().fit(pd.DataFrame({'code': [0.0, 1.0]}),
+                                   [0.0, 1.0])
+    with open(tmp_path / 'model.pkl', 'wb') as f:
+        pickle.dump(model, f)
+
+    store = bp.FeatureStore(str(tmp_path / 'store'), national, grid_res,
+                            tile_size=8).partition(str(tmp_path / 'features.csv'))
+    result = bp.predictGrid(str(tmp_path / 'model.pkl'), store, national,
+                            str(tmp_path / 'out'), grid_res=grid_res,
+                            tile_size=8, chunk_size=17, workers=2)
+    assert result['cells'] == len(samples) - 1
+
+    with rasterio.open(tmp_path / 'out' / 'risk_2020-01-01.tif') as src:
+        risk = src.read(1)
+        for long, lat in [(5.0, 5.0), (5.45, 5.2), (6.2, 6.3), (6.55, 6.65)]:
+            row, col = src.index(long, lat)
+            assert risk[row, col] == pytest.approx(lat * 1000 + long, rel=1e-6)
+        assert np.isfinite(risk).sum() == len(samples) - 1
+
+    table = pd.concat(pd.read_csv(tmp_path / 'out' / 'table' / 'date=2020-01-01' / name)
+                      for name in os.listdir(tmp_path / 'out' / 'table' / 'date=2020-01-01'))
+    assert table['id'].is_unique
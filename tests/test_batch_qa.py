@@ -0,0 +1,62 @@
+import importlib.util
+import os
+import sys
+
+import numpy as np
+import pytest
+
+rasterio = pytest.importorskip('rasterio')
+from rasterio.transform import from_origin
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# nasa_gibs is a folder of scripts, not a package
+spec = importlib.util.spec_from_file_location(
+    'batch_qa', os.path.join(ROOT, 'nasa_gibs', 'batch_qa.py'))
+batch_qa = importlib.util.module_from_spec(spec)
+# registered so pool workers can unpickle its functions by name
+sys.modules['batch_qa'] = batch_qa
+spec.loader.exec_module(batch_qa)
+
+
+def writeTiff(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with rasterio.open(path, 'w', driver='GTiff', height=data.shape[0],
+                       width=data.shape[1], count=1, dtype='float32',
+                       crs='EPSG:4326', nodata=0,
+                       transform=from_origin(5.0, 7.6, 0.01, 0.01)) as dst:
+        dst.write(data.astype('float32'), 1)
+
+
+def test_rerun_only_reads_changed_files(tmp_path, capsys):
+    rng = np.random.default_rng(0)
+    for i in range(12):
+        writeTiff(str(tmp_path / 'ndvi' / f"ndvi_{i}.tif"),
+                  rng.random((40, 30)) + 0.1)
+        # awkward sub-second mtimes, the kind a float csv column mangles
+        os.utime(tmp_path / 'ndvi' / f"ndvi_{i}.tif",
+                 ns=(1_792_433_824_639_214_300 + i * 123_456_789,) * 2)
+
+    batch_qa.runQA(str(tmp_path), workers=2, quicklook_px=16)
+    assert '12 new or changed' in capsys.readouterr().out
+
+    batch_qa.runQA(str(tmp_path), workers=2, quicklook_px=16)
+    assert '0 new or changed' in capsys.readouterr().out
+
+    os.utime(tmp_path / 'ndvi' / 'ndvi_3.tif')
+    index = batch_qa.runQA(str(tmp_path), workers=2, quicklook_px=16)
+    assert '1 new or changed' in capsys.readouterr().out
+    assert len(index) == 12
+
+
+def test_flags_blank_files(tmp_path, capsys):
+    writeTiff(str(tmp_path / 'bio' / 'bio_0.tif'), np.zeros((20, 20)))
+    writeTiff(str(tmp_path / 'bio' / 'bio_1.tif'), np.full((20, 20), 0.5))
+    writeTiff(str(tmp_path / 'bio' / 'bio_2.tif'), np.linspace(0.1, 1, 400).reshape(20, 20))
+
+    index = batch_qa.runQA(str(tmp_path), workers=1, quicklook_px=0)
+    assert index.set_index('path')['blank'].to_dict() == {
+        os.path.join('bio', 'bio_0.tif'): True,
+        os.path.join('bio', 'bio_1.tif'): True,
+        os.path.join('bio', 'bio_2.tif'): False,
+    }
@@ -0,0 +1,103 @@
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'src'))
+import job_queue as jq
+
+EDO = [5.00, 5.74, 6.66, 7.60]
+GRID_RES = 0.05
+
+
+class Killed(BaseException):
+    # not an Exception, so it escapes _runUnit like a dead process would
+    pass
+
+
+class FakeFetch():
+    # stands in for getMultiSensorData: samples createGridPoints-style
+    #  points with ids counting from 0 within the requested bbox
+
+    def __init__(self, fail_first=False, kill_after=None):
+        self.fail_first = fail_first
+        self.kill_after = kill_after
+        self.calls = []
+
+    def __call__(self, bbox, start, end, grid_res=0.05, **kwargs):
+        key = (tuple(bbox), start)
+        if self.kill_after is not None and len(self.calls) >= self.kill_after:
+            raise Killed()
+        first = key not in self.calls
+        self.calls.append(key)
+        if self.fail_first and first:
+            raise RuntimeError('transient Earth Engine error')
+
+        longs = np.arange(bbox[0], bbox[2], grid_res)
+        lats = np.arange(bbox[1], bbox[3], grid_res)
+        long_grid, lat_grid = np.meshgrid(longs, lats)
+        return pd.DataFrame({'id': np.arange(long_grid.size),
+                             'long': long_grid.ravel(),
+                             'lat': lat_grid.ravel(),
+                             'date': start})
+
+
+def statuses(queue):
+    return queue.progress().set_index('region').loc['edo']
+
+
+def results(out_dir):
+    return pd.concat(pd.read_csv(path)
+                     for path in glob.glob(os.path.join(out_dir, 'edo', '*.csv')))
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = jq.JobQueue(str(tmp_path / 'jobs.sqlite'), str(tmp_path / 'out'))
+    queue.enqueue({'edo': EDO}, '2020-01-01', '2021-12-31',
+                  grid_res=GRID_RES, tile_cells=10)
+    return queue
+
+
+def test_failed_units_retry_within_one_run(queue):
+    fetch = FakeFetch(fail_first=True)
+    queue.run(fetch, workers=3, budget=jq.RequestBudget(60_000), backoff=0)
+
+    stats = statuses(queue)
+    assert stats['done'] == stats['units']
+    assert stats['failed'] == 0
+    # every unit failed once and then succeeded
+    assert len(fetch.calls) == 2 * stats['units']
+
+
+def test_resume_after_kill_has_no_gaps_or_duplicates(queue, tmp_path):
+    with pytest.raises(Killed):
+        queue.run(FakeFetch(kill_after=7), workers=2,
+                  budget=jq.RequestBudget(60_000), backoff=0)
+    done_before = statuses(queue)['done']
+    assert 0 < done_before < statuses(queue)['units']
+
+    # a new process: units left 'running' by the dead one are picked up
+    resumed = FakeFetch()
+    queue = jq.JobQueue(queue.db_path, queue.out_dir)
+    queue.run(resumed, workers=2, budget=jq.RequestBudget(60_000), backoff=0)
+
+    stats = statuses(queue)
+    assert stats['done'] == stats['units']
+    assert len(resumed.calls) == stats['units'] - done_before
+
+    data = results(queue.out_dir)
+    n_cols = len(np.arange(EDO[0], EDO[2], GRID_RES))
+    n_rows = len(np.arange(EDO[1], EDO[3], GRID_RES))
+    # ids are global to the region grid: each cell once per date range
+    assert not data.duplicated(['id', 'date']).any()
+    for _, part in data.groupby('date'):
+        assert sorted(part['id']) == list(range(n_cols * n_rows))
+    # and agree with the cell's position on that grid
+    lat_idx = np.rint((data['lat'] - EDO[1]) / GRID_RES)
+    long_idx = np.rint((data['long'] - EDO[0]) / GRID_RES)
+    assert (data['id'] == lat_idx * n_cols + long_idx).all()
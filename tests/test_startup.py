@@ -0,0 +1,113 @@
+import csv
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+LUCA = os.path.join(SRC_DIR, 'luca.py')
+GIBS_MAIN = os.path.join(ROOT, 'nasa_gibs', 'gibs-main.py')
+
+# every probe runs in a fresh interpreter with sockets disabled, so a
+#  module that reaches the network at import fails the test too
+PROBE = """
+import runpy, socket, sys
+sys.path.insert(0, {src!r})
+
+def _offline(*args, **kwargs):
+    raise OSError('network disabled in startup test')
+socket.socket.connect = _offline
+socket.getaddrinfo = _offline
+
+try:
+{body}
+except SystemExit as e:
+    if e.code not in (0, None):
+        raise
+print('LOADED=' + ','.join(m for m in {forbidden!r} if m in sys.modules))
+"""
+
+LOCAL = ['ee', 'geemap', 'seaborn', 'sklearn', 'scipy', 'matplotlib',
+         'requests', 'rasterio', 'cartopy', 'folium', 'geopandas', 'fiona']
+CLI_ONLY = LOCAL + ['pandas', 'numpy']
+
+
+def cli(*args):
+    return (f"    sys.argv = ['luca.py', *{list(args)!r}]\n"
+            f"    runpy.run_path({LUCA!r}, run_name='__main__')")
+
+
+def module(name):
+    return f"    import {name}"
+
+
+@pytest.fixture
+def tiny_csv(tmp_path):
+    columns = ['id', 'lat', 'long', 'date', 'month', 'year', 'ndvi', 'evi',
+               'ndvi_std', 'lst_k', 'lst_std', 'precip_total_mm',
+               'precip_lag1', 'sar_vv', 'sar_vh', 'elevation',
+               'tree_cover_2000', 'forest_loss', 'loss_year']
+    path = tmp_path / 'tiny.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for i in range(5):
+            for month in (1, 2, 3):
+                writer.writerow([i, 6 + i * 0.05, 5.5, f"2020-{month:02d}-01",
+                                 month, 2020, 0.5, 0.4, 0.01, 300, 1, 50, 40,
+                                 0.1, 0.02, 100, 50, i % 2, 20 if i % 2 else 0])
+    return str(path)
+
+
+# (probe body, modules that must stay unloaded, wall-clock budget in seconds)
+# budgets are loose enough for a slow CI box but well under what
+#  importing ee/geemap/sklearn at module level costs
+CASES = {
+    'cli-help': (lambda csv_path: cli('--help'), CLI_ONLY, 1.0),
+    'cli-split': (lambda csv_path: cli('split', csv_path, '--out', 'out'),
+                  # sklearn pulls in scipy itself
+                  [m for m in LOCAL if m not in ('sklearn', 'scipy')], 6.0),
+    'cli-features': (lambda csv_path: cli('features', csv_path, '--out', 'out'),
+                     [m for m in LOCAL if m != 'scipy'], 6.0),
+    'import-process_data': (lambda csv_path: module('process_data'), LOCAL, 3.0),
+    'import-main': (lambda csv_path: module('main'), LOCAL, 3.0),
+    'load-gibs-main': (
+        lambda csv_path: f"    runpy.run_path({GIBS_MAIN!r}, run_name='gibs_main')",
+        CLI_ONLY, 1.0),
+}
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_startup_budget(case, tiny_csv, tmp_path):
+    body, forbidden, budget = CASES[case]
+    code = PROBE.format(src=SRC_DIR, body=body(tiny_csv), forbidden=forbidden)
+
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+
+    assert result.returncode == 0, result.stderr
+    loaded = result.stdout.strip().splitlines()[-1].split('=', 1)[1]
+    assert not loaded, f"{case} imported {loaded}"
+    assert elapsed < budget, f"{case} took {elapsed:.2f}s (budget {budget}s)"
+
+
+def test_fetch_without_earth_engine_fails_before_queueing(tmp_path):
+    try:
+        import ee  # noqa: F401
+        pytest.skip('earthengine-api is installed')
+    except ImportError:
+        pass
+
+    result = subprocess.run([sys.executable, LUCA, 'fetch',
+                             '--db', 'jobs.sqlite', '--out', 'jobs'],
+                            cwd=tmp_path, capture_output=True, text=True)
+
+    assert result.returncode == 1
+    assert 'earthengine-api is not installed' in result.stdout
+    assert 'Traceback' not in result.stderr
+    assert not (tmp_path / 'jobs.sqlite').exists()